@@ -1,10 +1,18 @@
-from fastapi import FastAPI, HTTPException, Query, Security, Depends
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Security, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security.api_key import APIKeyHeader
-from pydantic import BaseModel
 from typing import Optional
+from urllib.parse import quote
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import httpx
+import orjson
 import os
+import re
+import time
 
 # Import DDGS (DuckDuckGo Search)
 try:
@@ -13,6 +21,13 @@ try:
 except ImportError:
     DDGS_AVAILABLE = False
 
+# Import redis (cache L2 partage optionnel, active via REDIS_URL)
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # --- Protection par cle API ---
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
@@ -30,6 +45,211 @@ def get_api_key(api_key: str = Security(api_key_header)):
         detail="Cle API invalide ou manquante. Fournissez votre cle dans le header 'X-API-Key'.",
     )
 
+# Balises <span class="searchmatch"> dont Wikipedia entoure les termes trouves
+_SEARCHMATCH_RE = re.compile(r"</?span[^>]*>")
+
+# --- Validation des parametres ---
+_Q_RE = re.compile(r"\S")
+_REGION_RE = re.compile(r"^[a-z]{2}-[a-z]{2}$")
+# Couvre les sous-domaines wiki reels (fr, simple, zh-min-nan, be-tarask, ...)
+# tout en excluant les caracteres permettant une injection d'hote
+_LANG_RE = re.compile(r"^[a-z]{2,12}(-[a-z]{2,12})*$")
+
+
+def _clean_q(q: str) -> str:
+    """Valide le parametre 'q' (un seul scan regex) et renvoie sa forme strip()ee."""
+    if not q or not _Q_RE.search(q):
+        raise HTTPException(status_code=400, detail="Parametre 'q' requis et non vide.")
+    return q.strip()
+
+
+def _check_region(region: str) -> None:
+    """Rejette les codes region invalides avant tout appel amont."""
+    if not _REGION_RE.match(region):
+        raise HTTPException(status_code=400, detail="Parametre 'region' invalide (ex: fr-fr, en-us, wt-wt).")
+
+
+def _check_lang(lang: str) -> None:
+    """Rejette les codes langue Wikipedia invalides avant tout appel amont."""
+    if not _LANG_RE.match(lang):
+        raise HTTPException(status_code=400, detail="Parametre 'lang' invalide (ex: fr, en, de).")
+
+
+# --- Cache HTTP (CDN / navigateur) ---
+# Les reponses etant stables plusieurs minutes, un ETag + Cache-Control permet
+# aux caches en amont de repondre 304 sans meme atteindre l'API.
+_CACHE_CONTROL = "public, max-age=300"
+
+
+def _etag(*parts) -> str:
+    """Construit un ETag a partir des parametres de la requete.
+
+    Un seau temporel aligne sur le TTL du cache entre dans le hash : l'ETag
+    tourne quand les donnees servies peuvent changer, sinon les revalidations
+    If-None-Match re-serviraient indefiniment la meme representation en 304.
+    """
+    bucket = int(time.time() // _CACHE_TTL)
+    return '"' + hashlib.sha1(":".join(map(str, (*parts, bucket))).encode()).hexdigest() + '"'
+
+
+def _reponse_304_ou_headers(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Renvoie une 304 si l'ETag du client correspond, sinon pose les en-tetes de cache."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    return None
+
+# --- Cache TTL en memoire ---
+# Les requetes identiques (q, region, max_results) court-circuitent l'appel amont
+# pendant 10 minutes.
+_CACHE_MAXSIZE = 1024
+_CACHE_TTL = 600  # secondes
+_search_cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL)
+_news_cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL)
+_images_cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL)
+_wikipedia_cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL)
+
+# --- Cache L2 Redis (optionnel) ---
+# En multi-workers, chaque process a son propre cache TTL ; un Redis partage
+# (REDIS_URL) evite que chaque worker refasse le meme appel amont. Toute
+# erreur Redis est ignoree : l'API fonctionne alors sur le cache L1 seul.
+_redis = None
+
+
+def _redis_key(name: str, key: tuple) -> str:
+    return "s:" + name + ":" + ":".join(map(str, key))
+
+
+async def _l2_get(rkey: str):
+    if _redis is None:
+        return None
+    try:
+        raw = await _redis.get(rkey)
+        return orjson.loads(raw) if raw is not None else None
+    except Exception:
+        # Valeur corrompue ou Redis injoignable : on retombe sur un fetch frais
+        return None
+
+
+async def _l2_set(rkey: str, payload: dict) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.set(rkey, orjson.dumps(payload), ex=_CACHE_TTL)
+    except Exception:
+        pass
+
+# --- Single-flight ---
+# Sur un cache miss, un seul appel amont part par cle ; les requetes
+# identiques concurrentes attendent le meme Future au lieu de relancer
+# l'appel, et les cles distinctes restent parallelisables.
+_inflight: dict = {}
+_inflight_lock = asyncio.Lock()
+
+
+async def _single_flight(name: str, cache: TTLCache, key, fetch):
+    """Renvoie cache[key] (L1), le cache Redis (L2), ou execute fetch() une seule fois par cle en vol."""
+    async with _inflight_lock:
+        if key in cache:
+            return cache[key]
+        waiting = _inflight.get(key)
+        if waiting is None:
+            fut = asyncio.get_running_loop().create_future()
+            _inflight[key] = fut
+    if waiting is not None:
+        return await waiting
+    try:
+        rkey = _redis_key(name, key)
+        payload = await _l2_get(rkey)
+        if payload is None:
+            payload = await fetch()
+            await _l2_set(rkey, payload)
+        cache[key] = payload
+        fut.set_result(payload)
+        return payload
+    except BaseException as exc:
+        fut.set_exception(exc)
+        fut.exception()  # consomme l'exception si aucune requete n'attendait
+        raise
+    finally:
+        async with _inflight_lock:
+            _inflight.pop(key, None)
+
+# Pool de threads dedie aux appels DDGS bloquants : la concurrence ne depend
+# plus du threadpool global AnyIO de FastAPI (plafonne a 40)
+_DDGS_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix="ddgs")
+
+# Instance DDGS unique : la session HTTP sous-jacente (et ses handshakes TLS)
+# est construite une seule fois et reutilisee par toutes les requetes
+_DDGS = DDGS() if DDGS_AVAILABLE else None
+
+
+def _ddgs_call(method: str, q: str, max_results: int, region: str) -> list:
+    """Execute un appel DDGS bloquant (text/news/images) en flux borne.
+
+    Itere le generateur DDGS dans une liste pre-dimensionnee et s'arrete a
+    max_results : pas de reallocation de liste ni d'items au-dela de ce que
+    le client recevra.
+    """
+    global _DDGS
+    try:
+        results = [None] * max_results
+        n = 0
+        for item in getattr(_DDGS, method)(q, max_results=max_results, region=region):
+            results[n] = item
+            n += 1
+            if n == max_results:
+                break
+        del results[n:]
+        return results
+    except Exception:
+        # Si la session partagee est corrompue, on la reconstruit pour la
+        # prochaine requete avant de propager l'erreur
+        _DDGS = DDGS()
+        raise
+
+# --- Garde-fous amont DDGS ---
+# Chaque appel DDGS est borne dans le temps, et apres _BREAKER_SEUIL echecs
+# consecutifs sur un meme endpoint un disjoncteur repond 503 pendant
+# _BREAKER_PAUSE secondes sans appeler l'amont : un backend DuckDuckGo lent
+# ne peut plus saturer le pool de threads.
+_DDGS_TIMEOUT = 8.0  # secondes
+_BREAKER_SEUIL = 5
+_BREAKER_PAUSE = 30.0  # secondes
+_ddgs_failures = {"text": 0, "news": 0, "images": 0}
+_ddgs_open_until = {"text": 0.0, "news": 0.0, "images": 0.0}
+
+
+def _note_ddgs_failure(method: str) -> None:
+    _ddgs_failures[method] += 1
+    if _ddgs_failures[method] >= _BREAKER_SEUIL:
+        _ddgs_open_until[method] = time.monotonic() + _BREAKER_PAUSE
+        _ddgs_failures[method] = 0
+
+
+async def _ddgs_fetch(method: str, q: str, max_results: int, region: str) -> list:
+    """Appel DDGS via le pool de threads, borne a _DDGS_TIMEOUT et disjoncte."""
+    if time.monotonic() < _ddgs_open_until[method]:
+        raise HTTPException(
+            status_code=503,
+            detail="Moteur de recherche temporairement indisponible (trop d'echecs recents).",
+        )
+    loop = asyncio.get_running_loop()
+    try:
+        raw = await asyncio.wait_for(
+            loop.run_in_executor(_DDGS_POOL, _ddgs_call, method, q, max_results, region),
+            timeout=_DDGS_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        _note_ddgs_failure(method)
+        raise HTTPException(status_code=504, detail="Delai de recherche depasse.")
+    except Exception as exc:
+        _note_ddgs_failure(method)
+        raise HTTPException(status_code=503, detail=f"Erreur lors de la recherche : {str(exc)}")
+    _ddgs_failures[method] = 0
+    return raw
+
 # --- Application FastAPI ---
 app = FastAPI(
     title="API Recherche Web Securisee",
@@ -37,9 +257,34 @@ app = FastAPI(
         "API de recherche web utilisant DuckDuckGo (texte, actualites, images) "
         "et Wikipedia. Protegee par cle API (header X-API-Key)."
     ),
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# Client HTTP partage (keep-alive + HTTP/2) : evite un handshake TLS par requete
+@app.on_event("startup")
+async def demarrage():
+    global _redis
+    app.state.http = httpx.AsyncClient(
+        timeout=10.0,
+        http2=True,
+        headers={"User-Agent": "SearchAPI/3.0 (https://github.com/sonia-video-api/api-recherche-web)"},
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+    redis_url = os.environ.get("REDIS_URL", "")
+    if REDIS_AVAILABLE and redis_url:
+        _redis = aioredis.from_url(redis_url)
+
+
+@app.on_event("shutdown")
+async def arret():
+    global _redis
+    await app.state.http.aclose()
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
 # Autoriser tout le monde (CORS)
 app.add_middleware(
     CORSMiddleware,
@@ -49,212 +294,305 @@ app.add_middleware(
 )
 
 
-class SearchResult(BaseModel):
-    title: str
-    url: str
-    content: Optional[str] = None
-    source: str
-
-
-class NewsResult(BaseModel):
-    title: str
-    url: str
-    body: Optional[str] = None
-    date: Optional[str] = None
-    source: Optional[str] = None
-
-
-class ImageResult(BaseModel):
-    title: str
-    url: str
-    image_url: str
-    thumbnail: Optional[str] = None
-    source: Optional[str] = None
+# Reponse d'accueil construite une seule fois a l'import : la route racine
+# (sollicitee par les health checks) ne reconstruit ni le dict ni le JSON.
+_ACCUEIL = {
+    "message": "API Recherche Web Securisee en ligne !",
+    "version": "3.0.0",
+    "moteur": "DuckDuckGo + Wikipedia",
+    "authentification": "Header requis : X-API-Key: <votre_cle>",
+    "endpoints": {
+        "/search": "Recherche web generale  (?q=...&max_results=10&region=fr-fr)",
+        "/news": "Recherche d'actualites     (?q=...&max_results=10)",
+        "/images": "Recherche d'images        (?q=...&max_results=10)",
+        "/multi": "Web + actualites + images  (?q=...&max_results=10)",
+        "/wikipedia": "Recherche Wikipedia       (?q=...&lang=fr)",
+    },
+    "exemples": [
+        "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/search?q=python",
+        "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/news?q=IA",
+        "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/wikipedia?q=Paris&lang=fr",
+    ],
+    "documentation": "/docs",
+}
+_ACCUEIL_BYTES = orjson.dumps(_ACCUEIL)
 
 
 @app.get("/")
 def accueil():
-    return {
-        "message": "API Recherche Web Securisee en ligne !",
-        "version": "3.0.0",
-        "moteur": "DuckDuckGo + Wikipedia",
-        "authentification": "Header requis : X-API-Key: <votre_cle>",
-        "endpoints": {
-            "/search": "Recherche web generale  (?q=...&max_results=10&region=fr-fr)",
-            "/news": "Recherche d'actualites     (?q=...&max_results=10)",
-            "/images": "Recherche d'images        (?q=...&max_results=10)",
-            "/wikipedia": "Recherche Wikipedia       (?q=...&lang=fr)",
-        },
-        "exemples": [
-            "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/search?q=python",
-            "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/news?q=IA",
-            "curl -H 'X-API-Key: VOTRE_CLE' https://api-recherche-web.onrender.com/wikipedia?q=Paris&lang=fr",
-        ],
-        "documentation": "/docs",
-    }
+    return Response(content=_ACCUEIL_BYTES, media_type="application/json")
 
 
-@app.get("/search", response_model=dict)
-def recherche_web(
+@app.get("/search")
+async def recherche_web(
+    request: Request,
+    response: Response,
     q: str = Query(..., description="Terme a rechercher"),
     max_results: int = Query(10, ge=1, le=50, description="Nombre maximum de resultats"),
     region: str = Query("fr-fr", description="Region (ex: fr-fr, en-us, wt-wt)"),
     api_key: str = Depends(get_api_key),
 ):
     """Recherche web generale via DuckDuckGo. Requiert X-API-Key."""
-    if not q or not q.strip():
-        raise HTTPException(status_code=400, detail="Parametre 'q' requis et non vide.")
+    q = _clean_q(q)
+    _check_region(region)
     if not DDGS_AVAILABLE:
         raise HTTPException(status_code=503, detail="Moteur de recherche non disponible.")
-    try:
-        with DDGS() as ddgs:
-            raw = list(ddgs.text(q.strip(), max_results=max_results, region=region))
+    etag = _etag("search", q.lower(), region, max_results)
+    not_modified = _reponse_304_ou_headers(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    key = (q.lower(), region, max_results)
+
+    async def _fetch():
+        raw = await _ddgs_fetch("text", q, max_results, region)
         results = [
-            SearchResult(
-                title=item.get("title", "Sans titre"),
-                url=item.get("href", ""),
-                content=item.get("body", ""),
-                source="DuckDuckGo",
-            )
+            {
+                "title": item.get("title", "Sans titre"),
+                "url": item.get("href", ""),
+                "content": item.get("body", ""),
+                "source": "DuckDuckGo",
+            }
             for item in raw
         ]
-        return {"query": q, "region": region, "count": len(results), "results": [r.model_dump() for r in results]}
-    except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"Erreur lors de la recherche : {str(exc)}")
+        return {"query": q, "region": region, "count": len(results), "results": results}
 
+    return await _single_flight("search", _search_cache, key, _fetch)
 
-@app.get("/news", response_model=dict)
-def recherche_actualites(
+
+@app.get("/news")
+async def recherche_actualites(
+    request: Request,
+    response: Response,
     q: str = Query(..., description="Terme a rechercher"),
     max_results: int = Query(10, ge=1, le=50, description="Nombre maximum de resultats"),
     region: str = Query("fr-fr", description="Region (ex: fr-fr, en-us)"),
     api_key: str = Depends(get_api_key),
 ):
     """Recherche d'actualites via DuckDuckGo News. Requiert X-API-Key."""
-    if not q or not q.strip():
-        raise HTTPException(status_code=400, detail="Parametre 'q' requis et non vide.")
+    q = _clean_q(q)
+    _check_region(region)
     if not DDGS_AVAILABLE:
         raise HTTPException(status_code=503, detail="Moteur de recherche non disponible.")
-    try:
-        with DDGS() as ddgs:
-            raw = list(ddgs.news(q.strip(), max_results=max_results, region=region))
+    etag = _etag("news", q.lower(), region, max_results)
+    not_modified = _reponse_304_ou_headers(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    key = (q.lower(), region, max_results)
+
+    async def _fetch():
+        raw = await _ddgs_fetch("news", q, max_results, region)
         results = [
-            NewsResult(
-                title=item.get("title", "Sans titre"),
-                url=item.get("url", ""),
-                body=item.get("body", ""),
-                date=item.get("date", ""),
-                source=item.get("source", ""),
-            )
+            {
+                "title": item.get("title", "Sans titre"),
+                "url": item.get("url", ""),
+                "body": item.get("body", ""),
+                "date": item.get("date", ""),
+                "source": item.get("source", ""),
+            }
             for item in raw
         ]
-        return {"query": q, "region": region, "count": len(results), "results": [r.model_dump() for r in results]}
-    except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"Erreur lors de la recherche : {str(exc)}")
+        return {"query": q, "region": region, "count": len(results), "results": results}
+
+    return await _single_flight("news", _news_cache, key, _fetch)
 
 
-@app.get("/images", response_model=dict)
-def recherche_images(
+@app.get("/images")
+async def recherche_images(
+    request: Request,
+    response: Response,
     q: str = Query(..., description="Terme a rechercher"),
     max_results: int = Query(10, ge=1, le=50, description="Nombre maximum de resultats"),
     region: str = Query("fr-fr", description="Region (ex: fr-fr, en-us)"),
     api_key: str = Depends(get_api_key),
 ):
     """Recherche d'images via DuckDuckGo Images. Requiert X-API-Key."""
-    if not q or not q.strip():
-        raise HTTPException(status_code=400, detail="Parametre 'q' requis et non vide.")
+    q = _clean_q(q)
+    _check_region(region)
     if not DDGS_AVAILABLE:
         raise HTTPException(status_code=503, detail="Moteur de recherche non disponible.")
-    try:
-        with DDGS() as ddgs:
-            raw = list(ddgs.images(q.strip(), max_results=max_results, region=region))
+    etag = _etag("images", q.lower(), region, max_results)
+    not_modified = _reponse_304_ou_headers(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    key = (q.lower(), region, max_results)
+
+    async def _fetch():
+        raw = await _ddgs_fetch("images", q, max_results, region)
         results = [
-            ImageResult(
-                title=item.get("title", "Sans titre"),
-                url=item.get("url", ""),
-                image_url=item.get("image", ""),
-                thumbnail=item.get("thumbnail", ""),
-                source=item.get("source", ""),
-            )
+            {
+                "title": item.get("title", "Sans titre"),
+                "url": item.get("url", ""),
+                "image_url": item.get("image", ""),
+                "thumbnail": item.get("thumbnail", ""),
+                "source": item.get("source", ""),
+            }
             for item in raw
         ]
-        return {"query": q, "region": region, "count": len(results), "results": [r.model_dump() for r in results]}
-    except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"Erreur lors de la recherche : {str(exc)}")
+        return {"query": q, "region": region, "count": len(results), "results": results}
 
+    return await _single_flight("images", _images_cache, key, _fetch)
 
-@app.get("/wikipedia", response_model=dict)
+
+@app.get("/multi")
+async def recherche_multi(
+    q: str = Query(..., description="Terme a rechercher"),
+    max_results: int = Query(10, ge=1, le=50, description="Nombre maximum de resultats par categorie"),
+    region: str = Query("fr-fr", description="Region (ex: fr-fr, en-us)"),
+    api_key: str = Depends(get_api_key),
+):
+    """Recherche web + actualites + images en un seul appel. Requiert X-API-Key.
+
+    Les trois appels DDGS partent en parallele dans le pool de threads :
+    le temps de reponse est celui du plus lent, pas la somme des trois.
+    """
+    q = _clean_q(q)
+    _check_region(region)
+    if not DDGS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Moteur de recherche non disponible.")
+    raw_web, raw_news, raw_images = await asyncio.gather(
+        _ddgs_fetch("text", q, max_results, region),
+        _ddgs_fetch("news", q, max_results, region),
+        _ddgs_fetch("images", q, max_results, region),
+    )
+    web = [
+        {
+            "title": item.get("title", "Sans titre"),
+            "url": item.get("href", ""),
+            "content": item.get("body", ""),
+            "source": "DuckDuckGo",
+        }
+        for item in raw_web
+    ]
+    news = [
+        {
+            "title": item.get("title", "Sans titre"),
+            "url": item.get("url", ""),
+            "body": item.get("body", ""),
+            "date": item.get("date", ""),
+            "source": item.get("source", ""),
+        }
+        for item in raw_news
+    ]
+    images = [
+        {
+            "title": item.get("title", "Sans titre"),
+            "url": item.get("url", ""),
+            "image_url": item.get("image", ""),
+            "thumbnail": item.get("thumbnail", ""),
+            "source": item.get("source", ""),
+        }
+        for item in raw_images
+    ]
+    return {
+        "query": q,
+        "region": region,
+        "web": {"count": len(web), "results": web},
+        "news": {"count": len(news), "results": news},
+        "images": {"count": len(images), "results": images},
+    }
+
+
+@app.get("/wikipedia")
 async def recherche_wikipedia(
+    request: Request,
+    response: Response,
     q: str = Query(..., description="Terme a rechercher sur Wikipedia"),
     lang: str = Query("fr", description="Langue Wikipedia (fr, en, de, es, ...)"),
     api_key: str = Depends(get_api_key),
 ):
     """Recherche et resume Wikipedia via l'API officielle gratuite. Requiert X-API-Key."""
-    if not q or not q.strip():
-        raise HTTPException(status_code=400, detail="Parametre 'q' requis et non vide.")
-    try:
-        search_url = f"https://{lang}.wikipedia.org/w/api.php"
-        params_search = {
-            "action": "query",
-            "list": "search",
-            "srsearch": q.strip(),
-            "format": "json",
-            "srlimit": 5,
-        }
-        headers = {"User-Agent": "SearchAPI/3.0 (https://github.com/sonia-video-api/api-recherche-web)"}
-        async with httpx.AsyncClient(timeout=10.0, headers=headers) as client:
-            resp = await client.get(search_url, params=params_search)
+    q = _clean_q(q)
+    _check_lang(lang)
+    etag = _etag("wikipedia", q.lower(), lang)
+    not_modified = _reponse_304_ou_headers(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    key = (q.lower(), lang)
+
+    async def _fetch():
+        try:
+            search_url = f"https://{lang}.wikipedia.org/w/api.php"
+            # Une seule requete : list=search pour les resultats + generator=search
+            # + prop=extracts pour le resume du meilleur article (evite 2 allers-retours)
+            params_query = {
+                "action": "query",
+                "list": "search",
+                "srsearch": q,
+                "srlimit": 5,
+                "generator": "search",
+                "gsrsearch": q,
+                "gsrlimit": 1,
+                "prop": "extracts",
+                "exintro": True,
+                "explaintext": True,
+                "format": "json",
+            }
+            client = app.state.http
+            resp = await client.get(search_url, params=params_query)
             resp.raise_for_status()
-            data = resp.json()
-
-        search_results = data.get("query", {}).get("search", [])
-        if not search_results:
-            return {"query": q, "lang": lang, "count": 0, "results": []}
-
-        top_title = search_results[0]["title"]
-        params_summary = {
-            "action": "query",
-            "prop": "extracts",
-            "exintro": True,
-            "explaintext": True,
-            "titles": top_title,
-            "format": "json",
-        }
-        async with httpx.AsyncClient(timeout=10.0, headers=headers) as client:
-            resp2 = await client.get(search_url, params=params_summary)
-            resp2.raise_for_status()
-            data2 = resp2.json()
+            data = orjson.loads(resp.content)
 
-        pages = data2.get("query", {}).get("pages", {})
-        page = next(iter(pages.values()), {})
-        extract = page.get("extract", "")[:1000]
+            search_results = data.get("query", {}).get("search", [])
+            if not search_results:
+                return {"query": q, "lang": lang, "count": 0, "results": []}
 
-        results = [
-            {
-                "title": item["title"],
-                "url": f"https://{lang}.wikipedia.org/wiki/{item['title'].replace(' ', '_')}",
-                "snippet": item.get("snippet", "").replace('<span class="searchmatch">', "").replace("</span>", ""),
-                "wordcount": item.get("wordcount", 0),
+            top_title = search_results[0]["title"]
+            pages = data.get("query", {}).get("pages", {})
+            page = next(iter(pages.values()), {})
+            # La requete groupee sert de prefetch speculatif du resume : si le
+            # generator a renvoye une autre page que le meilleur resultat
+            # (redirection, normalisation), on corrige avec un fetch cible.
+            if page.get("title", top_title) != top_title:
+                params_fix = {
+                    "action": "query",
+                    "prop": "extracts",
+                    "exintro": True,
+                    "explaintext": True,
+                    "titles": top_title,
+                    "format": "json",
+                }
+                resp_fix = await client.get(search_url, params=params_fix)
+                resp_fix.raise_for_status()
+                pages = orjson.loads(resp_fix.content).get("query", {}).get("pages", {})
+                page = next(iter(pages.values()), {})
+            extract = page.get("extract", "")[:1000]
+
+            base_url = f"https://{lang}.wikipedia.org/wiki/"
+            results = [
+                {
+                    "title": item["title"],
+                    "url": base_url + quote(item["title"].replace(" ", "_")),
+                    "snippet": _SEARCHMATCH_RE.sub("", item.get("snippet", "")),
+                    "wordcount": item.get("wordcount", 0),
+                }
+                for item in search_results
+            ]
+            return {
+                "query": q,
+                "lang": lang,
+                "count": len(results),
+                "top_article": {
+                    "title": top_title,
+                    "url": results[0]["url"],
+                    "extract": extract,
+                },
+                "results": results,
             }
-            for item in search_results
-        ]
-        return {
-            "query": q,
-            "lang": lang,
-            "count": len(results),
-            "top_article": {
-                "title": top_title,
-                "url": f"https://{lang}.wikipedia.org/wiki/{top_title.replace(' ', '_')}",
-                "extract": extract,
-            },
-            "results": results,
-        }
-    except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"Erreur Wikipedia : {str(exc)}")
+        except Exception as exc:
+            raise HTTPException(status_code=503, detail=f"Erreur Wikipedia : {str(exc)}")
+
+    return await _single_flight("wikipedia", _wikipedia_cache, key, _fetch)
 
 
 # Point d'entree pour Render (variable PORT) ou local
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "api:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        loop="uvloop",
+        http="httptools",
+    )